@@ -6,7 +6,7 @@ This script fetches your scheduled Runna workouts from Garmin Connect,
 adds Zone 2 HR targets to warmup/recovery/easy steps, and updates them.
 
 Requirements:
-    pip install garminconnect
+    pip install garminconnect orjson
 
 Usage:
     export GARMIN_EMAIL="your@email.com"
@@ -19,29 +19,108 @@ Usage:
 
 import os
 import sys
-import json
 import argparse
-import copy
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Tuple
 
+import orjson
 from garminconnect import Garmin
 
 # Garmin workout step types
-EASY_STEP_KEYS = {"warmup", "cooldown", "recovery"}
-EASY_STEP_IDS = {1, 2, 3}  # warmup=1, cooldown=2, recovery=3 (rest=4 excluded)
+EASY_STEP_KEYS = frozenset({"warmup", "cooldown", "recovery"})
+EASY_STEP_IDS = frozenset({1, 2, 3})  # warmup=1, cooldown=2, recovery=3 (rest=4 excluded)
+# Keys and IDs don't overlap, so one set answers "is this an easy step type" for either
+_EASY_STEP_TYPES = EASY_STEP_KEYS | EASY_STEP_IDS
 
 # Description patterns that indicate easy/conversational pace (from Runna)
 EASY_DESCRIPTION_PATTERNS = ["conversational", "easy", "slow"]
 # Description patterns that indicate hard effort - skip these
 HARD_DESCRIPTION_PATTERNS = ["pushing", "fast", "hard", "tempo", "threshold", "race", "sprint"]
 
-HR_ZONE_TARGET_TYPE = {
+# Compiled once so each description is scanned in a single pass
+_EASY_RE = re.compile("|".join(map(re.escape, EASY_DESCRIPTION_PATTERNS)))
+_HARD_RE = re.compile("|".join(map(re.escape, HARD_DESCRIPTION_PATTERNS)))
+
+# Read-only so every modified step can share it without risk of aliasing bugs
+HR_ZONE_TARGET_TYPE = MappingProxyType({
     "workoutTargetTypeId": 4,
     "workoutTargetTypeKey": "heart.rate.zone"
-}
+})
 NO_TARGET_TYPE_ID = 1
 DEFAULT_HR_ZONE = 2
 
+# Concurrent workers for fetching/updating workouts (kept within the HTTP pool size)
+MAX_WORKERS = 8
+
+# Workouts requested per list call - larger limits are split into concurrent pages
+WORKOUTS_PAGE_SIZE = 100
+
+# Refresh the OAuth2 token before going concurrent if it expires within this many seconds
+TOKEN_REFRESH_MARGIN = 300
+
+# HTTP connection pool settings - requests keeps sockets alive, the pool just needs
+# room for every worker. Retry settings match garth's own defaults
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+HTTP_RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+HTTP_BACKOFF_FACTOR = 0.5
+
+# Marks an exhausted iterator in the step walk (None can't be used - it's a valid JSON value)
+_END = object()
+
+
+def _json_default(obj):
+    """Serialize read-only constants (e.g. HR_ZONE_TARGET_TYPE) that orjson doesn't handle natively"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+@lru_cache(maxsize=512)
+def _classify_step(step_key: str, step_id: int, description: str) -> bool:
+    """Classify a step as easy from its type and description (cached - Runna repeats these a lot)"""
+    step_key = step_key.lower()
+
+    # Warmup, cooldown, recovery are easy; intervals depend on the description.
+    # Anything else can't be easy, so skip the description scan entirely
+    easy_type = step_key in _EASY_STEP_TYPES or step_id in _EASY_STEP_TYPES
+    if not easy_type and step_key != "interval":
+        return False
+
+    if description:
+        description = description.lower()
+
+    # Check description for hard effort indicators - never add HR zone to these
+    if _HARD_RE.search(description):
+        return False
+
+    if easy_type:
+        return True
+
+    # For intervals, only add HR zone if description indicates easy pace
+    if _EASY_RE.search(description):
+        return True
+    return False  # Interval without easy indicator = skip
+
+
+def _should_add_hr_zone(step: dict) -> bool:
+    """Determine if a workout step should have HR zone target added - cheapest test first"""
+    # Only steps with no target set can get the HR zone
+    target_type = step.get("targetType")
+    if target_type is not None and target_type.get("workoutTargetTypeId") not in (None, NO_TARGET_TYPE_ID):
+        return False
+
+    step_type = step.get("stepType", {})
+    return _classify_step(
+        step_type.get("stepTypeKey", ""),
+        step_type.get("stepTypeId"),
+        step.get("description") or ""
+    )
+
 
 class GarminHRZoneInjector:
     def __init__(self, email: str, password: str, hr_zone: int = DEFAULT_HR_ZONE):
@@ -55,78 +134,95 @@ class GarminHRZoneInjector:
         print(f"Logging in as {self.email}...")
         self.client = Garmin(self.email, self.password)
         self.client.login()
+        self.configure_session()
         print(f"Logged in as: {self.client.display_name}\n")
 
+    def configure_session(self):
+        """Size garth's connection pool so concurrent API calls reuse keep-alive connections"""
+        self.client.garth.configure(
+            pool_connections=HTTP_POOL_CONNECTIONS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            status_forcelist=HTTP_RETRY_STATUSES,
+            backoff_factor=HTTP_BACKOFF_FACTOR
+        )
+
+    def authorization(self) -> str:
+        """Get the Authorization header value, refreshing the OAuth2 token first if it's about to expire"""
+        token = self.client.garth.oauth2_token
+        if token.expires_at - time.time() < TOKEN_REFRESH_MARGIN:
+            self.client.garth.refresh_oauth2()
+        return str(self.client.garth.oauth2_token)
+
+    def api_request(self, method: str, path: str, auth: str, headers: dict = None, **kwargs):
+        """Thread-safe Connect API request on garth's session.
+
+        garth's own request() keeps the response in a shared `last_resp` attribute (and may
+        refresh the token), so concurrent calls through it can return each other's responses.
+        This only uses the underlying requests session, whose connection pool is thread-safe,
+        with an Authorization header built on the main thread.
+        """
+        garth = self.client.garth
+        resp = garth.sess.request(
+            method,
+            f"https://connectapi.{garth.domain}{path}",
+            headers={**(headers or {}), "Authorization": auth},
+            timeout=garth.timeout,
+            **kwargs
+        )
+        resp.raise_for_status()
+        return resp
+
+    def fetch_workouts(self, limit: int, **params) -> list:
+        """Fetch up to `limit` workout summaries, requesting pages concurrently"""
+        # Pages are fetched through api_request, which is safe to call from worker threads
+        auth = self.authorization()
+
+        def fetch_page(start: int) -> list:
+            return self.api_request("GET", "/workout-service/workouts", auth, params={
+                "start": start,
+                "limit": min(WORKOUTS_PAGE_SIZE, limit - (start - 1)),
+                "myWorkoutsOnly": "true",
+                "sharedWorkoutsOnly": "false",
+                "includeAtp": "false",
+                **params
+            }).json() or []
+
+        starts = range(1, limit + 1, WORKOUTS_PAGE_SIZE)
+        if len(starts) <= 1:
+            return fetch_page(1)
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(starts))) as pool:
+            pages = pool.map(fetch_page, starts)
+            return [w for page in pages for w in page]
+
     def list_workouts(self, limit: int = 30):
         """List all workouts with their IDs and basic info"""
-        workouts = self.client.connectapi("/workout-service/workouts", params={
-            "start": 1,
-            "limit": limit,
-            "myWorkoutsOnly": "true",
-            "sharedWorkoutsOnly": "false",
-            "orderBy": "WORKOUT_NAME",
-            "orderSeq": "ASC",
-            "includeAtp": "false"
-        })
-
-        print(f"Found {len(workouts)} workouts:\n")
-        print(f"{'ID':<12} {'Sport':<10} {'Name':<40}")
-        print("-" * 65)
-
-        for w in workouts:
-            workout_id = w.get("workoutId", "?")
-            sport = w.get("sportType", {}).get("sportTypeKey", "?")
-            name = w.get("workoutName", "?")[:38]
-            print(f"{workout_id:<12} {sport:<10} {name:<40}")
+        workouts = self.fetch_workouts(limit, orderBy="WORKOUT_NAME", orderSeq="ASC")
+
+        lines = [
+            f"Found {len(workouts)} workouts:\n",
+            f"{'ID':<12} {'Sport':<10} {'Name':<40}",
+            "-" * 65,
+        ]
+        lines.extend(
+            f"{w.get('workoutId', '?'):<12} "
+            f"{w.get('sportType', {}).get('sportTypeKey', '?'):<10} "
+            f"{w.get('workoutName', '?')[:38]:<40}"
+            for w in workouts
+        )
+        # One write instead of a print per workout
+        sys.stdout.write("\n".join(lines) + "\n")
 
         return workouts
 
-    def get_workout_details(self, workout_id: int) -> dict:
+    def get_workout_details(self, workout_id: int, auth: str = None) -> dict:
         """Fetch full workout details by ID"""
-        return self.client.connectapi(f"/workout-service/workout/{workout_id}")
-
-    def is_easy_step(self, step: dict) -> bool:
-        """Determine if a workout step is an 'easy' step that should get HR zone"""
-        step_type = step.get("stepType", {})
-        step_key = step_type.get("stepTypeKey", "").lower()
-        step_id = step_type.get("stepTypeId")
-        description = (step.get("description") or "").lower()
-
-        # Check description for hard effort indicators - never add HR zone to these
-        for pattern in HARD_DESCRIPTION_PATTERNS:
-            if pattern in description:
-                return False
-
-        # Warmup, cooldown, recovery are always easy
-        if step_key in EASY_STEP_KEYS or step_id in EASY_STEP_IDS:
-            return True
-
-        # For intervals, only add HR zone if description indicates easy pace
-        if step_key == "interval" or step_id == 3:
-            for pattern in EASY_DESCRIPTION_PATTERNS:
-                if pattern in description:
-                    return True
-            return False  # Interval without easy indicator = skip
-
-        return False
-
-    def has_no_target(self, step: dict) -> bool:
-        """Check if step has no target set (meaning we can add HR zone)"""
-        target_type = step.get("targetType")
-        if target_type is None:
-            return True
-        target_id = target_type.get("workoutTargetTypeId")
-        if target_id is None or target_id == NO_TARGET_TYPE_ID:
-            return True
-        return False
-
-    def should_add_hr_zone(self, step: dict) -> bool:
-        """Determine if a workout step should have HR zone target added"""
-        return self.is_easy_step(step) and self.has_no_target(step)
+        auth = auth or self.authorization()
+        return self.api_request("GET", f"/workout-service/workout/{workout_id}", auth).json()
 
     def add_hr_zone_to_step(self, step: dict) -> dict:
         """Add HR zone target to a workout step"""
-        step["targetType"] = copy.deepcopy(HR_ZONE_TARGET_TYPE)
+        step["targetType"] = HR_ZONE_TARGET_TYPE
         step["targetValueOne"] = self.hr_zone
         step["targetValueTwo"] = None
         step["zoneNumber"] = self.hr_zone
@@ -139,7 +235,8 @@ class GarminHRZoneInjector:
         end_value = step.get("endConditionValue")
 
         if end_condition == "time" and end_value:
-            duration = f"{int(end_value/60)}:{int(end_value%60):02d}"
+            minutes, seconds = divmod(int(end_value), 60)
+            duration = f"{minutes}:{seconds:02d}"
         elif end_condition == "distance" and end_value:
             duration = f"{end_value}m"
         else:
@@ -150,29 +247,31 @@ class GarminHRZoneInjector:
 
         return f"{step_type} ({duration}) -> target: {target_type} {target_val}"
 
-    def process_workout_steps(self, steps: list, modified_count: int = 0, verbose: bool = False) -> Tuple[list, int]:
-        """Recursively process workout steps, including nested repeat groups"""
-        processed_steps = []
+    def process_workout_steps(self, steps: list, verbose: bool = False) -> int:
+        """Process workout steps in place, including nested repeat groups. Returns the modified count"""
+        modified_count = 0
+        should_add = _should_add_hr_zone
+        # Explicit stack of step iterators instead of recursion, so deeply
+        # nested repeat groups can't hit the recursion limit
+        stack = [iter(steps)]
+
+        while stack:
+            step = next(stack[-1], _END)
+            if step is _END:
+                stack.pop()
+                continue
 
-        for step in steps:
             if "workoutSteps" in step:
-                nested_steps, modified_count = self.process_workout_steps(
-                    step["workoutSteps"], modified_count, verbose
-                )
-                step["workoutSteps"] = nested_steps
-                processed_steps.append(step)
-            else:
-                if self.should_add_hr_zone(step):
-                    if verbose:
-                        print(f"    + {self.describe_step(step)} -> Adding Zone {self.hr_zone}")
-                    step = self.add_hr_zone_to_step(step)
-                    modified_count += 1
-                else:
-                    if verbose:
-                        print(f"    - {self.describe_step(step)} -> Skip")
-                processed_steps.append(step)
+                stack.append(iter(step["workoutSteps"]))
+            elif should_add(step):
+                if verbose:
+                    print(f"    + {self.describe_step(step)} -> Adding Zone {self.hr_zone}")
+                self.add_hr_zone_to_step(step)
+                modified_count += 1
+            elif verbose:
+                print(f"    - {self.describe_step(step)} -> Skip")
 
-        return processed_steps, modified_count
+        return modified_count
 
     def modify_workout(self, workout: dict, verbose: bool = False) -> Tuple[dict, int]:
         """Modify a workout to add HR zone targets to appropriate steps"""
@@ -186,40 +285,33 @@ class GarminHRZoneInjector:
 
         for segment in workout["workoutSegments"]:
             if "workoutSteps" in segment:
-                segment["workoutSteps"], modified = self.process_workout_steps(
-                    segment["workoutSteps"], 0, verbose
-                )
-                total_modified += modified
+                total_modified += self.process_workout_steps(segment["workoutSteps"], verbose)
 
         return workout, total_modified
 
-    def update_workout(self, workout: dict) -> dict:
+    def update_workout(self, workout: dict, auth: str = None):
         """Push updated workout back to Garmin Connect"""
         workout_id = workout.get("workoutId")
-        return self.client.garth.put(
-            "connectapi",
+        auth = auth or self.authorization()
+        return self.api_request(
+            "PUT",
             f"/workout-service/workout/{workout_id}",
-            json=workout
+            auth,
+            headers={"Content-Type": "application/json"},
+            data=orjson.dumps(workout, default=_json_default)
         )
 
     def process_all_workouts(self, dry_run: bool = False, limit: int = 20, verbose: bool = False, filter_name: str = None):
         """Main processing loop - fetch, modify, and update workouts"""
-        workouts = self.client.connectapi("/workout-service/workouts", params={
-            "start": 1,
-            "limit": limit,
-            "myWorkoutsOnly": "true",
-            "sharedWorkoutsOnly": "false",
-            "includeAtp": "false"
-        })
+        workouts = self.fetch_workouts(limit)
 
         print(f"Found {len(workouts)} workouts")
         print("-" * 50)
 
-        processed = 0
-        modified_total = 0
-
+        # Filter on the summary fields so skipped workouts never cost a details request
+        name_filter = filter_name.lower() if filter_name else None
+        candidates = []
         for workout_summary in workouts:
-            workout_id = workout_summary.get("workoutId")
             workout_name = workout_summary.get("workoutName", "Unknown")
 
             sport_type = workout_summary.get("sportType", {}).get("sportTypeKey", "")
@@ -228,31 +320,69 @@ class GarminHRZoneInjector:
                     print(f"Skip '{workout_name}' (sport: {sport_type})")
                 continue
 
-            if filter_name and filter_name.lower() not in workout_name.lower():
+            if name_filter and name_filter not in workout_name.lower():
                 continue
 
-            print(f"\nProcessing: {workout_name} (ID: {workout_id})")
+            candidates.append(workout_summary)
 
-            workout = self.get_workout_details(workout_id)
-            modified_workout, modified_count = self.modify_workout(workout, verbose)
+        processed = 0
+        modified_total = 0
 
-            if modified_count == 0:
-                print(f"  No changes needed")
-                continue
+        # Workers only go through api_request (see its docstring), with the token
+        # refreshed here on the main thread
+        auth = self.authorization()
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            # Fetch all workout details concurrently - each one is a network round-trip
+            futures = {
+                pool.submit(self.get_workout_details, w.get("workoutId"), auth): w
+                for w in candidates
+            }
+            details = {}
+            for future in as_completed(futures):
+                workout_summary = futures[future]
+                try:
+                    details[workout_summary.get("workoutId")] = future.result()
+                except Exception as e:
+                    print(f"  Failed to fetch '{workout_summary.get('workoutName', 'Unknown')}': {e}")
+            candidates = [w for w in candidates if w.get("workoutId") in details]
+
+            # Modify on the main thread so verbose output stays in order
+            to_update = []
+            for workout_summary in candidates:
+                workout_id = workout_summary.get("workoutId")
+                workout_name = workout_summary.get("workoutName", "Unknown")
+
+                print(f"\nProcessing: {workout_name} (ID: {workout_id})")
 
-            print(f"  Modified {modified_count} steps to add Zone {self.hr_zone} HR target")
-            modified_total += modified_count
+                modified_workout, modified_count = self.modify_workout(details[workout_id], verbose)
 
-            if dry_run:
-                print(f"  DRY RUN - would update workout")
-            else:
+                if modified_count == 0:
+                    print(f"  No changes needed")
+                    continue
+
+                print(f"  Modified {modified_count} steps to add Zone {self.hr_zone} HR target")
+                modified_total += modified_count
+
+                if dry_run:
+                    print(f"  DRY RUN - would update workout")
+                else:
+                    to_update.append((workout_name, modified_workout))
+
+            # Push updates concurrently, then report in submission order
+            if to_update:
+                print(f"\nUpdating {len(to_update)} workouts...")
+            update_futures = [
+                (workout_name, pool.submit(self.update_workout, modified_workout, auth))
+                for workout_name, modified_workout in to_update
+            ]
+            for workout_name, future in update_futures:
                 try:
-                    print(f"  Updating workout...")
-                    self.update_workout(modified_workout)
-                    print(f"  Updated successfully")
+                    future.result()
+                    print(f"  Updated '{workout_name}' successfully")
                     processed += 1
                 except Exception as e:
-                    print(f"  Failed to update: {e}")
+                    print(f"  Failed to update '{workout_name}': {e}")
                     print(f"     You may need to manually recreate this workout")
 
         print(f"\n{'='*50}")
@@ -351,7 +481,10 @@ Examples:
         elif args.dump_workout:
             print(f"Fetching workout {args.dump_workout}...")
             workout = injector.get_workout_details(args.dump_workout)
-            print("\n" + json.dumps(workout, indent=2))
+            print()
+            sys.stdout.flush()
+            sys.stdout.buffer.write(orjson.dumps(workout, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+            sys.stdout.buffer.flush()
         else:
             if args.dry_run:
                 print("DRY RUN MODE - No changes will be made\n")